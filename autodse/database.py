@@ -1,18 +1,170 @@
 """
 The module of result database.
 """
+import hashlib
+import heapq
+import itertools
 import os
 import pickle
 import sys
-from queue import PriorityQueue
+from collections import OrderedDict, deque
+from functools import partial
+from queue import Empty
 from threading import Lock
 from time import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Generator, Iterable, List, Optional, Tuple, Union
 
 from .logger import get_default_logger
 from .parameter import gen_key_from_design_point
 from .result import HLSResult, MerlinResult, Result
 
+# Serialize results with the highest (fastest and most compact) pickle protocol.
+# Results only carry primitive fields so no out-of-band buffer is needed.
+_dumps = partial(pickle.dumps, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def digest_code_hash(code_hash: str) -> bytes:
+    """Compute a fixed-size digest of the given code hash.
+
+    Args:
+        code_hash: The code hash generated by the analyzer.
+
+    Returns:
+        The SHA-256 digest of the code hash.
+    """
+    return hashlib.sha256(code_hash.encode('utf-8')).digest()
+
+
+class BestCache():
+    """A thread-safe min heap of best results with an optional capacity.
+
+    The interface (put/get/qsize/empty/queue) is compatible with PriorityQueue, but
+    the heap trims itself on insertion when the capacity is set, so the caller does
+    not have to drain the worst results periodically.
+
+    Explorer threads submit new items to a pending queue without touching the heap,
+    and the pending items are merged into the heap by readers (or the main flow).
+    The submitting thread merges by itself when too many items are pending, so the
+    pending queue stays bounded even if nobody reads the cache.
+
+    Attributes:
+        heap: The underlying min heap.
+        pending: The submitted items that have not been merged into the heap.
+        capacity: The maximum number of kept items, or None if unlimited.
+        lock: The thread lock to protect the heap.
+    """
+
+    # The maximum number of pending items before the submitting thread merges them
+    MAX_PENDING = 1000
+
+    def __init__(self, capacity: Optional[int] = None):
+        """Constructor
+
+        Args:
+            capacity: The maximum number of kept items, or None if unlimited.
+        """
+        self.heap: List[Tuple[float, int, Result]] = []
+        # Note that append and popleft of deque are atomic under the GIL
+        self.pending: deque = deque()
+        self.capacity = capacity
+        self.lock = Lock()
+
+    @property
+    def queue(self) -> List[Tuple[float, int, Result]]:
+        """The underlying min heap with all submitted items merged."""
+        self.merge()
+        return self.heap
+
+    def resize(self, capacity: Optional[int]) -> None:
+        """Set a new capacity and drop the worst items that exceed it.
+
+        Args:
+            capacity: The maximum number of kept items, or None if unlimited.
+        """
+
+        with self.lock:
+            self.capacity = capacity
+            if capacity is not None:
+                while len(self.heap) > capacity:
+                    heapq.heappop(self.heap)
+
+    def push(self, item: Tuple[float, int, Result]) -> None:
+        """Push an item to the heap. The caller must hold the lock.
+
+        Args:
+            item: The item in the format of (quality, tiebreaker, result).
+        """
+
+        if self.capacity is not None and len(self.heap) >= self.capacity:
+            heapq.heappushpop(self.heap, item)
+        else:
+            heapq.heappush(self.heap, item)
+
+    def extend(self, items: List[Tuple[float, int, Result]]) -> None:
+        """Push a list of items at once with a single heapify.
+
+        Args:
+            items: The items in the format of (quality, tiebreaker, result).
+        """
+
+        with self.lock:
+            self.heap.extend(items)
+            heapq.heapify(self.heap)
+            if self.capacity is not None:
+                while len(self.heap) > self.capacity:
+                    heapq.heappop(self.heap)
+
+    def put(self, item: Tuple[float, int, Result]) -> None:
+        """Push a new item and drop the worst one if the capacity is exceeded.
+
+        Args:
+            item: The item in the format of (quality, tiebreaker, result).
+        """
+
+        with self.lock:
+            self.push(item)
+
+    def submit(self, item: Tuple[float, int, Result]) -> None:
+        """Submit a new item without locking the heap. It will be merged later.
+
+        Args:
+            item: The item in the format of (quality, tiebreaker, result).
+        """
+        self.pending.append(item)
+        if len(self.pending) > self.MAX_PENDING:
+            self.merge()
+
+    def merge(self) -> None:
+        """Merge all submitted items into the heap."""
+
+        with self.lock:
+            while True:
+                try:
+                    self.push(self.pending.popleft())
+                except IndexError:
+                    break
+
+    def get(self) -> Tuple[float, int, Result]:
+        """Pop the worst item.
+
+        Returns:
+            The item with the lowest quality.
+        """
+
+        self.merge()
+        with self.lock:
+            if not self.heap:
+                raise Empty()
+            return heapq.heappop(self.heap)
+
+    def qsize(self) -> int:
+        """Return the number of kept items."""
+        return len(self.queue)
+
+    def empty(self) -> bool:
+        """Return True if the cache is empty."""
+        return not self.queue
+
 
 class Database():
     """Base class of result database
@@ -21,10 +173,14 @@ class Database():
         db_id: A unique ID of this database.
         log: Logger
         db_file_path: Path to persist the database.
-        best_cache: A priority queue for best results.
-        code_hash_map: A dictionary to map code hash to the corresponding HLS result.
+        best_cache: A min heap for best results.
+        best_order: A counter to order the results with the same quality in the best cache.
+        code_hash_map: A dictionary to map code hash digest to the corresponding HLS result.
     """
 
+    # The maximum number of values to be deserialized at once when scanning the database
+    QUERY_BATCH_SIZE = 1000
+
     def __init__(self, name: str, db_file_path: Optional[str] = None):
         """Constructor
 
@@ -45,40 +201,45 @@ class Database():
             self.db_file_path = db_file_path
 
         # Current best result set (min heap)
-        # Note: the element type in this PriorityQueue is (quality, timestamp, result).
-        # The purpose of using timestamp is to deal with points with same qualities,
-        # since PriorityQueue tries to compare the second tuple value if the first one
-        # is the same. We define the first point among the same quality points is
-        # the one we want.
-        # FIXME: we now rely on the main flow to control the size in order to
-        # avoid race condition.
-        self.best_cache: PriorityQueue = PriorityQueue()
+        # Note: the element type in this heap is (quality, order, result).
+        # The purpose of using the insertion order is to deal with points with same
+        # qualities, since heapq tries to compare the second tuple value if the first
+        # one is the same. We define the first point among the same quality points is
+        # the one we want. The order comes from an itertools.count, which is strictly
+        # increasing and thread-safe under the GIL without a system call like time().
+        # The cache is unlimited by default and the main flow sets its capacity
+        # before launching the exploration.
+        self.best_cache: BestCache = BestCache()
+        self.best_order = itertools.count()
 
         # Code hash set
         # The purpose of the set is to avoid taking two points that result in the same
         # HLS code generated by Merlin.
-        self.code_hash_map: Dict[str, str] = {}
-
-    def init_best_cache(self) -> None:
-        """Initialize the best cache using the loaded data."""
-
-        if self.count() == 0:
-            return
+        # Note that the code hash from Merlin is the whole transformed kernel code, so we
+        # only keep its fixed-size digest to save memory and hashing time.
+        self.code_hash_map: Dict[bytes, str] = {}
 
-        for result in [r for r in self.query_all() if isinstance(r, HLSResult) and r.valid]:
-            if result.ret_code != Result.RetCode.DUPLICATED:
-                self.best_cache.put((result.quality, time(), result), timeout=0.1)
+    def _init_from_scan(self, results: Iterable[Any]) -> None:
+        """Initialize the best cache and the code hash map in one pass of the loaded data.
 
-    def init_code_hash_map(self) -> None:
-        """Initialize the code hash set using the loaded data."""
+        Args:
+            results: All data in the database.
+        """
 
-        if self.count() == 0:
-            return
+        best_items: List[Tuple[float, int, Result]] = []
+        for result in results:
+            if not isinstance(result, Result) or result.ret_code == Result.RetCode.DUPLICATED:
+                continue
 
-        for result in [r for r in self.query_all() if isinstance(r, MerlinResult)]:
-            if result.code_hash is not None and result.ret_code != Result.RetCode.DUPLICATED:
+            if isinstance(result, HLSResult) and result.valid:
+                best_items.append((result.quality, next(self.best_order), result))
+            elif isinstance(result, MerlinResult) and result.code_hash is not None:
                 assert result.point is not None
-                self.code_hash_map[result.code_hash] = gen_key_from_design_point(result.point)
+                self.code_hash_map[digest_code_hash(
+                    result.code_hash)] = gen_key_from_design_point(result.point)
+
+        # Build the best cache with one heapify instead of pushing results one by one
+        self.best_cache.extend(best_items)
 
     def add_code_hash(self, code_hash: str, key: str) -> Optional[str]:
         """Add a new code hash to the map and check if it already exists.
@@ -91,10 +252,10 @@ class Database():
             None if the code hash is new; otherwise the key with the same code hash.
         """
 
-        if code_hash in self.code_hash_map:
-            return self.code_hash_map[code_hash]
-        self.code_hash_map[code_hash] = key
-        return None
+        # Use setdefault to look up and insert with a single hashing. The returned key
+        # is the given one itself only if the code hash was new.
+        dup_key = self.code_hash_map.setdefault(digest_code_hash(code_hash), key)
+        return None if dup_key is key else dup_key
 
     def update_best(self, result: Result) -> None:
         """Check if the new result has the best QoR and update it if so.
@@ -110,7 +271,7 @@ class Database():
 
         if result.ret_code != Result.RetCode.DUPLICATED:
             try:
-                self.best_cache.put((result.quality, time(), result))
+                self.best_cache.submit((result.quality, next(self.best_order), result))
             except Exception as err:
                 self.log.error('Failed to update best cache: %s', str(err))
                 raise RuntimeError()
@@ -148,13 +309,19 @@ class Database():
             if isinstance(result, Result):
                 self.update_best(result)
 
-    def query_all(self) -> List[Any]:
+    def query_all(self) -> Generator[Any, None, None]:
         """Query all values in the database.
 
+        The values are queried chunk by chunk so that the whole database is never
+        deserialized at once. Use list() if random access is required.
+
         Returns:
-            All data in the database
+            A generator of all data in the database
         """
-        return [v for v in self.batch_query(self.query_keys()) if v is not None]
+        keys = self.query_keys()
+        for start in range(0, len(keys), self.QUERY_BATCH_SIZE):
+            yield from (v for v in self.batch_query(keys[start:start + self.QUERY_BATCH_SIZE])
+                        if v is not None)
 
     def load(self) -> None:
         """Load existing data from the given database and update the best cahce (if available)."""
@@ -232,8 +399,20 @@ class RedisDatabase(Database):
 
     Attributes:
         database: The Redis database.
+        result_cache: A LRU cache of deserialized values returned by query.
+        cache_version: The version of the cache, which is increased by every commit.
+        cache_lock: The thread lock to protect the cache.
     """
 
+    # The maximum number of commands to be sent in one pipeline execution
+    PIPELINE_BATCH_SIZE = 1000
+
+    # The maximum number of connections shared by all explorer threads
+    MAX_CONNECTIONS = 32
+
+    # The maximum number of deserialized values to be cached
+    RESULT_CACHE_SIZE = 10000
+
     def __init__(self, name: str, db_file_path: Optional[str] = None):
         """Constructor
 
@@ -246,7 +425,19 @@ class RedisDatabase(Database):
         import redis
 
         #TODO: scale-out
-        self.database = redis.StrictRedis(host='localhost', port=6379)
+        # Each command borrows a connection from the pool so that commands from different
+        # explorer threads can be in flight concurrently. The pool blocks instead of failing
+        # when all connections are in use.
+        pool = redis.BlockingConnectionPool(host='localhost',
+                                            port=6379,
+                                            max_connections=self.MAX_CONNECTIONS)
+        self.database = redis.StrictRedis(connection_pool=pool)
+
+        # Note that the cached values are shared by all callers of query so they
+        # must not be modified.
+        self.result_cache: OrderedDict = OrderedDict()
+        self.cache_version = 0
+        self.cache_lock = Lock()
 
         # Check the connection
         try:
@@ -268,10 +459,25 @@ class RedisDatabase(Database):
                     print('Failed to initialize the database: {}'.format(str(err)))
                     sys.exit(1)
             self.log.info('Load %d data from an existing database', len(data))
-            self.database.hmset(self.db_id, data)
+            self.pipeline_hset(list(data.items()))
+
+        self._init_from_scan(self.query_all())
 
-        self.init_best_cache()
-        self.init_code_hash_map()
+    def pipeline_hset(self, pairs: List[Tuple[Any, bytes]]) -> None:
+        """Set a list of serialized key-value pairs using pipelines.
+
+        The pairs are chunked so that each pipeline execution sends at most
+        PIPELINE_BATCH_SIZE commands to avoid a single huge command.
+
+        Args:
+            pairs: A list of key and serialized value pairs.
+        """
+
+        pipe = self.database.pipeline(transaction=False)
+        for start in range(0, len(pairs), self.PIPELINE_BATCH_SIZE):
+            for key, value in pairs[start:start + self.PIPELINE_BATCH_SIZE]:
+                pipe.hset(self.db_id, key, value)
+            pipe.execute()
 
     def __del__(self):
         """Delete the data we generated in Redis database"""
@@ -281,16 +487,43 @@ class RedisDatabase(Database):
     def query(self, key: str) -> Optional[Any]:
         #pylint:disable=missing-docstring
 
-        if not self.database.hexists(self.db_id, key):
-            return None
+        with self.cache_lock:
+            if key in self.result_cache:
+                self.result_cache.move_to_end(key)
+                return self.result_cache[key]
+            version = self.cache_version
 
+        # HGET returns None if the key does not exist
         pickled_obj = self.database.hget(self.db_id, key)
-        if pickled_obj:
-            try:
-                return pickle.loads(pickled_obj)
-            except ValueError as err:
-                self.log.error('Failed to deserialize the result of %s: %s', key, str(err))
-        return None
+        if not pickled_obj:
+            return None
+
+        try:
+            value = pickle.loads(pickled_obj)
+        except ValueError as err:
+            self.log.error('Failed to deserialize the result of %s: %s', key, str(err))
+            return None
+
+        # Skip caching if any commit happened during the query, since the value
+        # we got may be out-of-date
+        with self.cache_lock:
+            if version == self.cache_version:
+                self.result_cache[key] = value
+                if len(self.result_cache) > self.RESULT_CACHE_SIZE:
+                    self.result_cache.popitem(last=False)
+        return value
+
+    def invalidate_cache(self, keys: Iterable[str]) -> None:
+        """Remove the committed keys from the result cache.
+
+        Args:
+            keys: The keys to be removed.
+        """
+
+        with self.cache_lock:
+            for key in keys:
+                self.result_cache.pop(key, None)
+            self.cache_version += 1
 
     def batch_query(self, keys: List[str]) -> List[Optional[Any]]:
         #pylint:disable=missing=docstring
@@ -318,28 +551,33 @@ class RedisDatabase(Database):
     def commit_impl(self, key: str, result: Any) -> bool:
         #pylint:disable=missing-docstring
 
-        pickled_result = pickle.dumps(result)
+        pickled_result = _dumps(result)
         self.database.hset(self.db_id, key, pickled_result)
+        self.invalidate_cache([key])
         return True
 
     def batch_commit_impl(self, pairs: List[Tuple[str, Any]]) -> int:
         #pylint:disable=missing-docstring
 
-        data = {key: pickle.dumps(result) for key, result in pairs}
-        self.database.hmset(self.db_id, data)
+        data = {key: _dumps(result) for key, result in pairs}
+        if len(data) > self.PIPELINE_BATCH_SIZE:
+            self.pipeline_hset(list(data.items()))
+        else:
+            self.database.hmset(self.db_id, data)
+        self.invalidate_cache(data.keys())
         return len(data)
 
     def count(self) -> int:
         #pylint:disable=missing-docstring
-        return len(self.database.hkeys(self.db_id))
+        return self.database.hlen(self.db_id)
 
     def persist(self) -> bool:
         #pylint:disable=missing-docstring
 
-        dump_db = {
-            key: self.database.hget(self.db_id, key)
-            for key in self.database.hgetall(self.db_id)
-        }
+        # Incrementally scan all serialized values instead of using HGETALL, which blocks the
+        # Redis server from serving commits of other explorers until the whole hash is returned.
+        # Note that HSCAN may return a key more than once, which is resolved by the dictionary.
+        dump_db = dict(self.database.hscan_iter(self.db_id, count=self.QUERY_BATCH_SIZE))
         with open(self.db_file_path, 'wb') as filep:
             pickle.dump(dump_db, filep, pickle.HIGHEST_PROTOCOL)
 
@@ -354,8 +592,12 @@ class PickleDatabase(Database):
     Note that it is discouraged to use this database for DSE due to poor performance
     and the lack of multi-node support.
 
+    Note that only writes are protected by the lock. A read is a single dictionary lookup
+    in PickleDB, which is atomic under the GIL, so readers never block each other.
+
     Attributes:
-        lock: The thread lock to achieve thread-safe.
+        lock: The thread lock to serialize writes.
+        legacy: True if the database file is in the legacy JSON format.
         database: The Pickle database.
     """
 
@@ -365,37 +607,48 @@ class PickleDatabase(Database):
         import pickledb
         self.lock = Lock()
 
+        # The database is persisted in pickle format, but we still support loading
+        # the legacy JSON format dumped by PickleDB with jsonpickle encoded values.
+        self.legacy = True
+        if os.path.exists(self.db_file_path):
+            with open(self.db_file_path, 'rb') as filep:
+                # Pickle protocol 2 and above starts with the PROTO opcode
+                self.legacy = filep.read(1) != pickle.PROTO
+
         try:
             # Load the Pickle database
-            # Note that we cannot enable auto dump since we will pickle all data before persisting
-            self.database: pickledb.PickleDB = pickledb.load(self.db_file_path, False)
-        except ValueError as err:
+            # Note that we cannot enable auto dump since we persist the data by ourselves,
+            # and PickleDB can only parse JSON so it starts from empty for a pickle file.
+            self.database: pickledb.PickleDB = pickledb.load(
+                self.db_file_path if self.legacy else '', False)
+            if not self.legacy:
+                with open(self.db_file_path, 'rb') as filep:
+                    self.database.db = pickle.load(filep)
+        except (ValueError, EOFError, pickle.UnpicklingError) as err:
             print('Error: Failed to initialize the database: {}'.format(str(err)))
             sys.exit(1)
 
     def load(self) -> None:
         #pylint:disable=missing-docstring
-        import jsonpickle
 
         try:
             # Decode objects
-            for key in self.database.getall():
-                obj = jsonpickle.decode(self.database.get(key))
-                self.database.set(key, obj)
+            if self.legacy:
+                import jsonpickle
+                for key in self.database.getall():
+                    obj = jsonpickle.decode(self.database.get(key))
+                    self.database.set(key, obj)
             self.log.info('Load %d data from an existing database', self.count())
         except ValueError as err:
             print('Failed to load the data from the database: {}'.format(str(err)))
             sys.exit(1)
 
-        self.init_best_cache()
-        self.init_code_hash_map()
+        self._init_from_scan(self.query_all())
 
     def query(self, key: str) -> Optional[Any]:
         #pylint:disable=missing-docstring
 
-        self.lock.acquire()
         value: Union[bool, Result] = self.database.get(key)
-        self.lock.release()
         return None if isinstance(value, bool) else value
 
     def batch_query(self, keys: List[str]) -> List[Optional[Any]]:
@@ -404,12 +657,10 @@ class PickleDatabase(Database):
         if not keys:
             return []
 
-        self.lock.acquire()
         values: List[Optional[Any]] = []
         for key in keys:
             value = self.database.get(key)
             values.append(None if isinstance(value, bool) else value)
-        self.lock.release()
         return values
 
     def query_keys(self) -> List[str]:
@@ -440,10 +691,8 @@ class PickleDatabase(Database):
     def persist(self) -> bool:
         #pylint:disable=missing-docstring
 
-        import jsonpickle
-        # Pickle all results so that they are JSON seralizable
-        for key in self.database.getall():
-            pickled_obj = jsonpickle.encode(self.database.get(key))
-            self.database.set(key, pickled_obj)
+        with self.lock, open(self.db_file_path, 'wb') as filep:
+            pickle.dump(self.database.db, filep, pickle.HIGHEST_PROTOCOL)
+        self.legacy = False
 
-        return self.database.dump()
+        return True
@@ -243,17 +243,16 @@ def partition(space: DesignSpace, limit: int) -> Optional[List[DesignSpace]]:
             accum_part = len(part_queue) + len(next_queue)
             if parts and len(parts) == 1:
                 # Do not partition because it is fully shadowed
-                copied_space = deepcopy(curr_space)
-                default = copied_space[param_id].default
-                copied_space[param_id].option_expr = "['{0}']".format(default)
-                next_queue.append(copied_space)
+                # Note that the current space is popped so we can modify it in place
+                default = curr_space[param_id].default
+                curr_space[param_id].option_expr = "['{0}']".format(default)
+                next_queue.append(curr_space)
                 log.debug('%d: Stop partition %s due to shadow', ptr, param_id)
             elif not parts or accum_part + len(parts) > limit:
                 # Do not partition because it is either
                 # 1) not a partitionable parameter, or
                 # 2) the accumulated partition number reaches to the limit
-                copied_space = deepcopy(curr_space)
-                next_queue.append(copied_space)
+                next_queue.append(curr_space)
                 log.debug('%d: Stop partition %s due to not partitionable or too many %d', ptr,
                           param_id, limit)
             else:
@@ -3,17 +3,23 @@ The main DSE flow that integrates all modules
 """
 import argparse
 import glob
-import json
 import math
 import os
 import shutil
+import stat
 import sys
 import tempfile
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Any, Dict, List, Optional, Set
 
+try:
+    # orjson is much faster than the builtin json module but is optional
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # type: ignore
+
 from .config import build_config
 from .database import Database, RedisDatabase
 from .dsproc.dsproc import compile_design_space, partition
@@ -24,9 +30,12 @@ from .explorer.explorer import AccurateExplorer, FastExplorer
 from .logger import get_default_logger
 from .parameter import DesignPoint, DesignSpace
 from .reporter import Reporter
-from .result import HLSResult, Result
+from .result import HLSResult, Job, Result
 from .util import copy_dir
 
+# The interval in seconds of reporting the exploration status
+REPORT_INTERVAL = 1.0
+
 
 def arg_parser() -> argparse.Namespace:
     """Parse user arguments."""
@@ -200,23 +209,85 @@ class Main():
         try:
             old_files = os.listdir(self.work_dir)
             if old_files:
-                bak_dir = tempfile.mkdtemp(prefix='bak_', dir=self.work_dir)
-
-                # Move all files except for config and database files to the backup directory
-                for old_file in old_files:
-                    # Skip the backup directory of previous runs
-                    if old_file.startswith('bak_'):
-                        continue
-                    full_path = os.path.join(self.work_dir, old_file)
-                    if full_path not in [self.cfg_path, self.db_path]:
-                        shutil.move(full_path, bak_dir)
-                    else:
-                        shutil.copy(full_path, bak_dir)
+                # Renaming the workspace also moves the current directory if it is inside
+                # the workspace, so relative paths (e.g., log files) would point to the backup.
+                cwd = os.path.realpath(os.getcwd())
+                real_work_dir = os.path.realpath(self.work_dir)
+                if cwd == real_work_dir or cwd.startswith(real_work_dir + os.sep):
+                    return self.backup_workspace(old_files)
+
+                # Prepare a new workspace with config and database files, and then swap it
+                # with the whole old workspace. Only renames are left after the swap.
+                parent_dir = os.path.dirname(self.work_dir)
+                new_dir: Optional[str] = None
+                tmp_dir: Optional[str] = None
+                try:
+                    new_dir = tempfile.mkdtemp(prefix='new_', dir=parent_dir)
+                    # mkdtemp always uses mode 0700, so keep the mode of the workspace
+                    os.chmod(new_dir, stat.S_IMODE(os.stat(self.work_dir).st_mode))
+                    for old_file in old_files:
+                        full_path = os.path.join(self.work_dir, old_file)
+                        if not old_file.startswith('bak_') and full_path in [
+                                self.cfg_path, self.db_path
+                        ]:
+                            shutil.copy(full_path, new_dir)
+                    tmp_dir = tempfile.mkdtemp(prefix='bak_', dir=parent_dir)
+                    os.rename(self.work_dir, tmp_dir)
+                except OSError:
+                    # The workspace cannot be renamed (e.g., a mount point), fall back to
+                    # backup files one by one.
+                    if new_dir is not None:
+                        shutil.rmtree(new_dir, ignore_errors=True)
+                    if tmp_dir is not None:
+                        os.rmdir(tmp_dir)
+                    return self.backup_workspace(old_files)
+
+                # Move the old workspace into the new one as the backup directory and bring
+                # the backup directories of previous runs back
+                old_dir = tmp_dir
+                try:
+                    os.rename(new_dir, self.work_dir)
+                    bak_dir = os.path.join(self.work_dir, os.path.basename(tmp_dir))
+                    os.rename(tmp_dir, bak_dir)
+                    old_dir = bak_dir
+                    for old_file in old_files:
+                        if old_file.startswith('bak_'):
+                            os.rename(os.path.join(bak_dir, old_file),
+                                      os.path.join(self.work_dir, old_file))
+                except OSError as err:
+                    print('Error: Failed to backup the workspace: {}'.format(str(err)))
+                    print('Error: Files of the previous run are left in {}'.format(old_dir))
+                    sys.exit(1)
         except FileNotFoundError:
             os.makedirs(self.work_dir)
 
         return bak_dir
 
+    def backup_workspace(self, old_files: List[str]) -> str:
+        """Backup the workspace file by file.
+
+        Args:
+            old_files: The files in the workspace.
+
+        Returns:
+            The backup directory.
+        """
+
+        bak_dir = tempfile.mkdtemp(prefix='bak_', dir=self.work_dir)
+
+        # Move all files except for config and database files to the backup directory
+        for old_file in old_files:
+            # Skip the backup directory of previous runs
+            if old_file.startswith('bak_'):
+                continue
+            full_path = os.path.join(self.work_dir, old_file)
+            if full_path not in [self.cfg_path, self.db_path]:
+                shutil.move(full_path, bak_dir)
+            else:
+                shutil.copy(full_path, bak_dir)
+
+        return bak_dir
+
     def load_config(self) -> Dict[str, Any]:
         """Load the DSE configurations.
 
@@ -230,9 +301,10 @@ class Main():
                 raise RuntimeError()
 
             self.log.info('Loading configurations')
-            with open(self.args.config, 'r', errors='replace') as filep:
+            with open(self.args.config, 'rb') as filep:
                 try:
-                    user_config = json.load(filep)
+                    # Note that orjson.JSONDecodeError is a subclass of ValueError
+                    user_config = json_loads(filep.read())
                 except ValueError as err:
                     self.log.error('Failed to load config: %s', str(err))
                     raise RuntimeError()
@@ -304,13 +376,24 @@ class Main():
             [v for k, v in r.res_util.items() if k.startswith('util')])),
                      reverse=True)
         results = results[:int(self.config['project']['fast-output-num'])]
-        for result in results:
+
+        def emit(result: Result) -> Optional[Job]:
+            """Create a job and apply the design point of the given result."""
             job = self.evaluator.create_job()
+            if job:
+                assert result.point is not None
+                self.evaluator.apply_design_point(job, result.point)
+            return job
+
+        # Create jobs in parallel since copying and applying source files are I/O bound
+        with ThreadPoolExecutor() as executor:
+            jobs = list(executor.map(emit, results))
+
+        for result, job in zip(results, jobs):
             if not job:
                 continue
 
             assert result.point is not None
-            self.evaluator.apply_design_point(job, result.point)
             points.append(result.point)
             os.rename(job.path, os.path.join(out_fast_dir, str(idx)))
             result.path = str(idx)
@@ -339,6 +422,9 @@ class Main():
 
         pool = []
 
+        # Only keep the best result
+        self.db.best_cache.resize(1)
+
         # Launch a thread pool
         with ThreadPoolExecutor(max_workers=len(ds_list)) as executor:
             for idx, ds in enumerate(ds_list):
@@ -352,12 +438,14 @@ class Main():
 
             self.log.info('%d explorers have been launched', len(pool))
 
-            timer: float = (time.time() - self.start_time) / 60.0  # in minutes
-            while any([not exe.done() for exe in pool]):
-                time.sleep(1)
-                # Only keep the best result
-                while self.db.best_cache.qsize() > 1:
-                    self.db.best_cache.get()
+            pending = set(pool)
+            while pending:
+                # Wake up either when an explorer finishes or the report interval is reached
+                _, pending = wait(pending, timeout=REPORT_INTERVAL, return_when=FIRST_COMPLETED)
+                timer: float = (time.time() - self.start_time) / 60.0  # in minutes
+
+                # Merge the results submitted by explorers to the best cache
+                self.db.best_cache.merge()
 
                 # Print animation to let user know we are still working, or print dots every
                 # 5 mins if user disables the animation.
@@ -376,7 +464,6 @@ class Main():
                             except ValueError:
                                 pass
                     self.reporter.print_status(timer, count)
-                timer += 0.0167
 
         if self.args.mode == 'complete-check':
             return []
@@ -491,15 +578,14 @@ class Main():
                                    evaluator=self.evaluator,
                                    config=self.config)
 
-            timer: float = (time.time() - self.start_time) / 60.0  # in minutes
             while not proc.done():
-                time.sleep(1)
+                wait([proc], timeout=REPORT_INTERVAL)
+                timer: float = (time.time() - self.start_time) / 60.0  # in minutes
                 count = self.db.query('meta-expr-cnt-accurate')
                 try:
                     self.reporter.print_status(timer, int(count), 2)
                 except (TypeError, ValueError):
                     self.reporter.print_status(timer, 0, 2)
-                timer += 0.0167
 
         # Backup database again
         self.db.persist()
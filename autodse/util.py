@@ -4,7 +4,9 @@ The utilizes of Merlin DSE module.
 import math
 import os
 import shutil
+from functools import lru_cache
 from subprocess import PIPE, Popen, TimeoutExpired
+from types import CodeType
 from typing import Any, Dict, Generator, List, Optional, Tuple, Union
 
 from .logger import get_default_logger
@@ -24,6 +26,22 @@ SAFE_BUILTINS['sqrt'] = math.sqrt
 SAFE_LIST = list(SAFE_BUILTINS.keys())
 
 
+@lru_cache(maxsize=None)
+def compile_expr(expr: str) -> CodeType:
+    """Compile an expression string and cache the code object.
+
+        Design space expressions are evaluated repeatedly with different local values
+        when traversing and partitioning the design space, so we only parse them once.
+
+        Args:
+            expr: The expression string to be compiled.
+
+        Returns:
+            The compiled code object.
+    """
+    return compile(expr, '<safe_eval>', 'eval')
+
+
 def safe_eval(expr: str, local: Optional[Dict[str, Union[str, int]]] = None) -> Any:
     """A safe wrapper of Python builtin eval.
 
@@ -39,7 +57,7 @@ def safe_eval(expr: str, local: Optional[Dict[str, Union[str, int]]] = None) ->
         table.update(local)
 
     try:
-        return eval(expr, table)  #pylint: disable=eval-used
+        return eval(compile_expr(expr), table)  #pylint: disable=eval-used
     except NameError as err:
         get_default_logger('Util').error('eval failed: %s', str(err))
     return None
@@ -0,0 +1,6 @@
+#include<string>
+  //Original: #pragma ACCEL parallel factor=256
+for (int i = 0; i < 256; ++i) {
+  #pragma HLS unroll
+  a[i] = b[i];
+}
@@ -0,0 +1 @@
+../mcc_common.mk
\ No newline at end of file
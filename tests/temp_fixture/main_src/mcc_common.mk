@@ -0,0 +1 @@
+../../../examples/gemm/mcc_common.mk
\ No newline at end of file
@@ -2,9 +2,10 @@
 The unit test module for database.
 """
 import os
+import pickle
 
 from autodse import logger
-from autodse.database import PickleDatabase, RedisDatabase
+from autodse.database import BestCache, PickleDatabase, RedisDatabase
 from autodse.result import HLSResult, Result
 
 LOG = logger.get_default_logger('UNIT-TEST', 'DEBUG')
@@ -82,7 +83,7 @@ def database_tester(db_cls):
     assert db.count() == 4
 
     # Query all data
-    data = db.query_all()
+    data = list(db.query_all())
     assert len(data) == 4
 
     # Persist
@@ -111,7 +112,176 @@ def test_redis_database():
     database_tester(RedisDatabase)
 
 
+class FakeRedis():
+    """A dictionary-backed stand-in of redis.StrictRedis for the commands used
+    by RedisDatabase, so its logic can be tested without a Redis server."""
+
+    def __init__(self, **kwargs):
+        #pylint:disable=unused-argument
+        self.data = {}
+        self.hget_hook = None
+
+    def client_list(self):
+        #pylint:disable=missing-docstring
+        return []
+
+    def delete(self, name):
+        #pylint:disable=missing-docstring
+        self.data.pop(name, None)
+
+    def hget(self, name, key):
+        #pylint:disable=missing-docstring
+        value = self.data.get(name, {}).get(key)
+        if self.hget_hook:
+            self.hget_hook()
+        return value
+
+    def hset(self, name, key, value):
+        #pylint:disable=missing-docstring
+        self.data.setdefault(name, {})[key] = value
+
+    def hmset(self, name, mapping):
+        #pylint:disable=missing-docstring
+        self.data.setdefault(name, {}).update(mapping)
+
+
+def test_redis_query_cache(mocker):
+    #pylint:disable=missing-docstring
+
+    mocker.patch('redis.StrictRedis', FakeRedis)
+    mocker.patch.object(RedisDatabase, 'RESULT_CACHE_SIZE', 2)
+    db = RedisDatabase('DB_cache_test')
+
+    def make_result(key, quality):
+        result = HLSResult()
+        result.key = key
+        result.quality = quality
+        return result
+
+    # A cache hit returns the same object
+    db.commit('point0', make_result('point0', 1))
+    point = db.query('point0')
+    assert point.quality == 1
+    assert db.query('point0') is point
+    assert db.query('unknown') is None
+
+    # Commits evict the cached values
+    db.commit('point0', make_result('point0', 2))
+    assert 'point0' not in db.result_cache
+    assert db.query('point0').quality == 2
+    db.batch_commit([('point0', make_result('point0', 3)), ('point1', make_result('point1', 3))])
+    assert 'point0' not in db.result_cache
+    assert db.query('point0').quality == 3
+
+    # The value of a query overlapping a commit is not cached
+    db.database.hget_hook = lambda: db.commit('point1', make_result('point1', 4))
+    assert db.query('point1').quality == 3
+    db.database.hget_hook = None
+    assert 'point1' not in db.result_cache
+    assert db.query('point1').quality == 4
+
+    # The least recently used value is evicted when the cache is full
+    db.commit('point2', make_result('point2', 5))
+    db.query('point0')
+    db.query('point2')
+    assert list(db.result_cache.keys()) == ['point0', 'point2']
+    del db
+
+
 def test_pickle_database():
     #pylint:disable=missing-docstring
 
     database_tester(PickleDatabase)
+
+
+def test_pickle_database_legacy():
+    #pylint:disable=missing-docstring
+
+    import jsonpickle
+    import pickledb
+
+    # Write a database in the legacy JSON format with jsonpickle encoded values
+    if os.path.exists('./DB_legacy.db'):
+        os.remove('./DB_legacy.db')
+    legacy_db = pickledb.load('./DB_legacy.db', False)
+    for idx, (valid, quality) in enumerate([(True, 5), (True, 10), (False, 20)]):
+        point = HLSResult()
+        point.key = 'point{}'.format(idx)
+        point.valid = valid
+        point.quality = quality
+        legacy_db.set(point.key, jsonpickle.encode(point))
+    legacy_db.dump()
+
+    # Load the legacy database
+    db = PickleDatabase('DB_legacy', './DB_legacy.db')
+    assert db.legacy
+    db.load()
+    assert db.count() == 3
+    assert db.query('point1').quality == 10
+    assert db.best_cache.qsize() == 2
+    assert db.best_cache.queue[0][0] == 5
+
+    # The database should be persisted in pickle format
+    db.persist()
+    with open('./DB_legacy.db', 'rb') as filep:
+        assert filep.read(1) == pickle.PROTO
+    del db
+
+    db = PickleDatabase('DB_legacy', './DB_legacy.db')
+    assert not db.legacy
+    db.load()
+    assert db.count() == 3
+    assert db.query('point2').quality == 20
+    del db
+
+    os.remove('./DB_legacy.db')
+
+
+def test_best_cache():
+    #pylint:disable=missing-docstring
+
+    cache = BestCache()
+    for quality in [5, 20, 10, 15]:
+        result = HLSResult()
+        result.quality = quality
+        cache.put((quality, quality, result))
+    assert cache.qsize() == 4
+
+    # Shrink the cache and only keep the best results
+    cache.resize(2)
+    assert cache.qsize() == 2
+    assert cache.queue[0][0] == 15
+
+    # The cache should trim itself when exceeding the capacity
+    result = HLSResult()
+    result.quality = 30
+    cache.put((30, 30, result))
+    assert cache.qsize() == 2
+    assert cache.get()[0] == 20
+    assert cache.get()[0] == 30
+    assert cache.empty()
+
+    # Submitted items are merged when the cache is accessed
+    for quality in [1, 3, 2]:
+        result = HLSResult()
+        result.quality = quality
+        cache.submit((quality, quality, result))
+    assert not cache.heap
+    assert cache.qsize() == 2
+    assert cache.queue[0][0] == 2
+
+    # Bulk insert should also respect the capacity
+    items = []
+    for quality in [7, 4, 9]:
+        result = HLSResult()
+        result.quality = quality
+        items.append((quality, quality, result))
+    cache.extend(items)
+    assert cache.qsize() == 2
+    assert [cache.get()[0], cache.get()[0]] == [7, 9]
+
+    # Submitted items are merged by the submitter when too many are pending
+    for order, quality in enumerate(range(BestCache.MAX_PENDING + 1)):
+        cache.submit((quality, 100 + order, result))
+    assert not cache.pending
+    assert cache.heap[0][0] == BestCache.MAX_PENDING - 1
@@ -110,7 +110,7 @@ def test_evaluator_phase2(required_args, test_dir, mocker):
             #pylint:disable=unused-argument
             if mode == 'transform':
                 result = MerlinResult()
-                result.code_hash = job.point['PE']  # Pretend this is a code hash
+                result.code_hash = str(job.point['PE'])  # Pretend this is a code hash
             elif mode == 'hls':
                 result = HLSResult()
             else:
@@ -142,3 +142,49 @@ def test_main(test_dir, mocker):
         assert os.path.exists('{0}/temp_main_work/output/accurate/output.rpt'.format(test_dir))
         assert os.path.exists('{0}/temp_main_work/output/accurate/3'.format(test_dir))
         assert os.path.exists('{0}/temp_main_work/output/best'.format(test_dir))
+
+
+def test_init_workspace(test_dir, monkeypatch):
+    #pylint:disable=missing-docstring, redefined-outer-name
+
+    work_dir = '{0}/temp_ws_work'.format(str(test_dir))
+
+    def prepare_workspace():
+        if os.path.exists(work_dir):
+            shutil.rmtree(work_dir)
+        os.makedirs('{0}/bak_old'.format(work_dir))
+        os.makedirs('{0}/evaluate'.format(work_dir))
+        for name in ['config.json', 'result.db', 'dse.log']:
+            with open('{0}/{1}'.format(work_dir, name), 'w') as filep:
+                filep.write(name)
+        os.chmod(work_dir, 0o755)
+
+        main = Main.__new__(Main)
+        main.work_dir = work_dir
+        main.cfg_path = '{0}/config.json'.format(work_dir)
+        main.db_path = '{0}/result.db'.format(work_dir)
+        return main
+
+    # Backup the workspace with a single rename
+    main = prepare_workspace()
+    bak_dir = main.init_workspace()
+    assert os.path.dirname(bak_dir) == work_dir
+    assert sorted(os.listdir(work_dir)) == sorted(
+        ['bak_old', os.path.basename(bak_dir), 'config.json', 'result.db'])
+    assert sorted(os.listdir(bak_dir)) == ['config.json', 'dse.log', 'evaluate', 'result.db']
+    with open('{0}/config.json'.format(work_dir), 'r') as filep:
+        assert filep.read() == 'config.json'
+    assert os.stat(work_dir).st_mode & 0o777 == 0o755
+
+    # Backup files one by one if the current directory is inside the workspace
+    main = prepare_workspace()
+    work_dir_ino = os.stat(work_dir).st_ino
+    monkeypatch.chdir(work_dir)
+    bak_dir = main.init_workspace()
+    monkeypatch.undo()
+    assert os.stat(work_dir).st_ino == work_dir_ino
+    assert sorted(os.listdir(work_dir)) == sorted(
+        ['bak_old', os.path.basename(bak_dir), 'config.json', 'result.db'])
+    assert sorted(os.listdir(bak_dir)) == ['config.json', 'dse.log', 'evaluate', 'result.db']
+
+    shutil.rmtree(work_dir)